@@ -1,42 +1,93 @@
+import hashlib
 import streamlit as st
 from utils import answer_question
-from core.pdf_handler import extract_text_from_pdf, chunk_text
-from core.embeddings import load_embedding_model, create_embeddings
+from core.pdf_handler import iter_pdf_pages, chunk_text_stream
+from core.embeddings import (
+    load_embedding_model, 
+    create_embeddings, 
+    get_embedding_model_id
+)
 from core.vector_store import (
+    HNSW_MIN_CHUNKS, 
+    HNSW_MAX_CHUNKS, 
     create_vector_store, 
     clear_vector_store, 
-    get_vector_store_info
+    get_vector_store_info,
+    load_vector_store,
+    log_faiss_build_info,
+    save_vector_store
 )
 import config
 
 st.title("PDF Q&A System - Complete Pipeline")
 
+@st.cache_resource(show_spinner="Loading embedding model...")
+def warm_embedding_model():
+    """
+    Load the embedding model once per server process, before the first upload
+    """
+    return load_embedding_model()
+
+warm_embedding_model()
+log_faiss_build_info()
+
+def document_cache_key(pdf_bytes):
+    """
+    Key a processed PDF by its content and every setting that shapes the
+    stored chunks, embeddings and index
+    """
+    settings = "|".join(str(setting) for setting in (
+        get_embedding_model_id(),
+        config.CHUNK_SIZE,
+        config.CHUNK_OVERLAP,
+        config.USE_SQ8,
+        HNSW_MIN_CHUNKS,
+        HNSW_MAX_CHUNKS
+    ))
+    hasher = hashlib.blake2b(pdf_bytes, digest_size=16)
+    hasher.update(settings.encode("utf-8"))
+    return hasher.hexdigest()
+
 # File uploader
 uploaded_file = st.file_uploader("Choose a PDF file", type="pdf")
 
 if uploaded_file is not None:
-    # Process PDF
-    clear_vector_store()
+    # Identify the PDF (and processing settings) so unchanged uploads skip processing
+    pdf_hash = document_cache_key(uploaded_file.getvalue())
     
-    with st.spinner("Processing PDF..."):
-        # Extract text from PDF
-        extracted_text = extract_text_from_pdf(uploaded_file)
-        
-        # Chunk the text
-        chunks = chunk_text(
-            extracted_text, 
-            chunk_size=config.CHUNK_SIZE, 
-            chunk_overlap=config.CHUNK_OVERLAP
-        )
+    # Process PDF (reruns for new questions reuse the loaded store)
+    if get_vector_store_info()["document_key"] != pdf_hash:
+        clear_vector_store()
         
-        # Load embedding model
-        model = load_embedding_model()
-        
-        # Create embeddings for chunks
-        embeddings = create_embeddings(chunks)
-        
-        # Create vector store
-        index, embeddings, document_chunks = create_vector_store(chunks, embeddings)
+        with st.spinner("Processing PDF..."):
+            # Reuse a previously processed copy of the same PDF if there is one
+            if not load_vector_store(pdf_hash):
+                # Extract text page by page and chunk it as it arrives
+                try:
+                    chunks = list(chunk_text_stream(
+                        iter_pdf_pages(uploaded_file), 
+                        chunk_size=config.CHUNK_SIZE, 
+                        chunk_overlap=config.CHUNK_OVERLAP
+                    ))
+                except Exception as e:
+                    st.error(f"Error processing PDF: {str(e)}")
+                    st.stop()
+                
+                if not chunks:
+                    st.error("No readable text found in PDF. This might be a scanned document or image-only PDF.")
+                    st.stop()
+                
+                # Load embedding model
+                model = load_embedding_model()
+                
+                # Create embeddings for chunks
+                embeddings = create_embeddings(chunks)
+                
+                # Create vector store and cache it on disk
+                index, embeddings, document_chunks = create_vector_store(
+                    chunks, embeddings, document_key=pdf_hash
+                )
+                save_vector_store()
     
     st.success("PDF processed successfully!")
     
@@ -52,14 +103,19 @@ if uploaded_file is not None:
     if query:
         with st.spinner("Finding answer..."):
             # Get complete answer
-            result = answer_question(query)
+            result = answer_question(query, stream=True)
         
         # Display answer
         st.subheader("Answer:")
         
         if result["status"] == "success":
             st.success("✅ Answer generated successfully")
-            st.write(result["answer"])
+            
+            # Render tokens as they arrive (cached answers are already complete)
+            if result.get("answer_stream"):
+                st.write_stream(result["answer_stream"])
+            else:
+                st.write(result["answer"])
             
             # Show context used
             if result["context_chunks"]:
@@ -10,6 +10,17 @@ GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 CHUNK_SIZE = 1000
 CHUNK_OVERLAP = 200
 TOP_K_RESULTS = 3
+MIN_SIMILARITY = 0.3  # Chunks at or below this cosine similarity are ignored
+MAX_CONTEXT_CHARS = 6000  # Roughly 1500 tokens of document context per question
+
+# Embedding Settings
+EMBEDDING_BACKEND = "onnx"  # "onnx" (int8 ONNX Runtime, CPU) or "torch"
+ONNX_MODEL_DIR = "onnx/all-MiniLM-L6-v2-int8"
+ONNX_MODEL_FILE = "model_quantized.onnx"
+
+# Vector Store Settings
+USE_SQ8 = True  # Store embeddings as 8-bit scalar-quantized codes
+CACHE_DIR = "cache"  # Processed PDFs, keyed by content hash
 
 # Logging configuration
 LOG_LEVEL = "INFO"
@@ -2,30 +2,128 @@ from sentence_transformers import SentenceTransformer
 import torch
 import numpy as np
 import logging
+import os
+from functools import lru_cache
+import config
 
 logger = logging.getLogger(__name__)
 
 # Global variable to store the model (load once, use many times)
 _embedding_model = None
+_embedding_model_id = None  # Backend, model and precision actually loaded
+
+# Number of chunks encoded per forward pass
+EMBEDDING_BATCH_SIZE = 64
+
+# Number of recent query embeddings kept in memory
+QUERY_CACHE_SIZE = 512
+
+class OnnxEmbeddingModel:
+    """
+    Sentence embedding model running on ONNX Runtime
+    
+    Exposes the subset of SentenceTransformer.encode used in this module, with
+    mean pooling and L2 normalization done in NumPy on the encoder output.
+    """
+    
+    def __init__(self, model_dir, file_name, max_seq_length=256):
+        # Optional dependency, only needed for the ONNX backend
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+        from transformers import AutoTokenizer
+        
+        self.model = ORTModelForFeatureExtraction.from_pretrained(
+            model_dir, file_name=file_name, provider="CPUExecutionProvider"
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.max_seq_length = max_seq_length
+    
+    def encode(self, sentences, batch_size=32, convert_to_numpy=True,
+               normalize_embeddings=False, show_progress_bar=False):
+        """
+        Encode sentences into embeddings
+        
+        Args:
+            sentences (list or str): Texts to encode
+            batch_size (int): Number of texts per forward pass
+            convert_to_numpy (bool): Accepted for compatibility (always NumPy)
+            normalize_embeddings (bool): L2-normalize the embeddings
+            show_progress_bar (bool): Accepted for compatibility (ignored)
+        
+        Returns:
+            numpy.ndarray: Embedding for a string, or array of embeddings
+        """
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+        
+        batches = []
+        for i in range(0, len(sentences), batch_size):
+            inputs = self.tokenizer(
+                sentences[i:i + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np"
+            )
+            token_embeddings = self.model(**inputs).last_hidden_state
+            
+            # Mean pooling over real (non-padding) tokens
+            mask = inputs["attention_mask"][..., None].astype(np.float32)
+            summed = (token_embeddings * mask).sum(axis=1)
+            batches.append(summed / np.clip(mask.sum(axis=1), 1e-9, None))
+        
+        embeddings = np.concatenate(batches).astype(np.float32, copy=False)
+        
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings /= np.clip(norms, 1e-12, None)
+        
+        return embeddings[0] if single else embeddings
+
+def _load_onnx_model():
+    """
+    Load the exported int8 ONNX model, or return None if it is unavailable
+    """
+    model_path = os.path.join(config.ONNX_MODEL_DIR, config.ONNX_MODEL_FILE)
+    if not os.path.exists(model_path):
+        logger.warning(f"ONNX model not found at {model_path}, using PyTorch backend")
+        return None
+    
+    try:
+        model = OnnxEmbeddingModel(config.ONNX_MODEL_DIR, config.ONNX_MODEL_FILE)
+        logger.info(f"Successfully loaded ONNX embedding model from {config.ONNX_MODEL_DIR}")
+        return model
+    except ImportError as e:
+        logger.warning(f"ONNX Runtime backend unavailable ({str(e)}), using PyTorch backend")
+        return None
 
 def load_embedding_model(model_name="all-MiniLM-L6-v2"):
     """
     Load the sentence transformer model for creating embeddings
-    Optimized for Mac M4 with MPS support
+    Uses the int8 ONNX Runtime model when configured and exported,
+    otherwise PyTorch (optimized for Mac M4 with MPS support)
     
     Args:
         model_name (str): Name of the sentence transformer model
     
     Returns:
-        SentenceTransformer: Loaded model
+        SentenceTransformer or OnnxEmbeddingModel: Loaded model
     """
-    global _embedding_model
+    global _embedding_model, _embedding_model_id
     
     if _embedding_model is not None:
         logger.info("Using cached embedding model")
         return _embedding_model
     
     try:
+        if config.EMBEDDING_BACKEND == "onnx":
+            _embedding_model = _load_onnx_model()
+            if _embedding_model is not None:
+                _embedding_model_id = (
+                    f"onnx:{config.ONNX_MODEL_DIR}/{config.ONNX_MODEL_FILE}"
+                )
+                return _embedding_model
+        
         logger.info(f"Loading embedding model: {model_name}")
         
         # Check if MPS (Metal Performance Shaders) is available on Mac M4
@@ -42,6 +140,15 @@ def load_embedding_model(model_name="all-MiniLM-L6-v2"):
         # Load the model
         _embedding_model = SentenceTransformer(model_name, device=device)
         
+        # Use half precision on GPU backends for faster encoding
+        precision = "fp32"
+        if device in ("cuda", "mps"):
+            _embedding_model.half()
+            precision = "fp16"
+            logger.info("Using FP16 weights for embedding model")
+        
+        _embedding_model_id = f"torch:{model_name}:{precision}"
+        
         logger.info(f"Successfully loaded {model_name} on {device}")
         return _embedding_model
         
@@ -50,6 +157,17 @@ def load_embedding_model(model_name="all-MiniLM-L6-v2"):
         logger.error(error_msg)
         raise Exception(error_msg)
 
+def get_embedding_model_id():
+    """
+    Identify the loaded embedding backend, model and precision
+    (embeddings from different ids are not comparable)
+    
+    Returns:
+        str: Embedding model identifier
+    """
+    load_embedding_model()
+    return _embedding_model_id
+
 def create_embeddings(texts):
     """
     Convert text chunks into vector embeddings
@@ -58,7 +176,7 @@ def create_embeddings(texts):
         texts (list or str): Text chunks to convert to embeddings
     
     Returns:
-        numpy.ndarray: Array of embeddings
+        numpy.ndarray: Array of L2-normalized float32 embeddings
     """
     try:
         # Load model if not already loaded
@@ -73,13 +191,22 @@ def create_embeddings(texts):
         
         logger.info(f"Creating embeddings for {len(texts)} text chunks")
         
+        # Sort by length so each batch pads to similar-sized inputs
+        order = np.argsort([len(text) for text in texts], kind="stable")
+        sorted_texts = [texts[i] for i in order]
+        
         # Create embeddings
         embeddings = model.encode(
-            texts, 
+            sorted_texts,
+            batch_size=EMBEDDING_BATCH_SIZE,
             convert_to_numpy=True,
+            normalize_embeddings=True,
             show_progress_bar=len(texts) > 10  # Show progress for large batches
         )
         
+        # Restore original chunk order
+        embeddings = embeddings[np.argsort(order)].astype(np.float32, copy=False)
+        
         logger.info(f"Successfully created embeddings with shape: {embeddings.shape}")
         return embeddings
         
@@ -88,6 +215,32 @@ def create_embeddings(texts):
         logger.error(error_msg)
         raise Exception(error_msg)
 
+def encode_query(text):
+    """
+    Embed a single query string (fast path without batching or sorting)
+    
+    Args:
+        text (str): Query text
+    
+    Returns:
+        numpy.ndarray: Single L2-normalized float32 embedding vector
+    """
+    model = load_embedding_model()
+    embedding = model.encode(
+        text.strip(),
+        normalize_embeddings=True,
+        show_progress_bar=False
+    )
+    return embedding.astype(np.float32, copy=False)
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def _cached_embedding(normalized_text):
+    """
+    Embed a normalized text once and keep the raw float32 bytes
+    (bytes are immutable, so cached results cannot be modified by callers)
+    """
+    return encode_query(normalized_text).tobytes()
+
 def get_text_embedding(text):
     """
     Get embedding for a single text (useful for user queries)
@@ -96,14 +249,15 @@ def get_text_embedding(text):
         text (str): Single text to convert to embedding
     
     Returns:
-        numpy.ndarray: Single embedding vector
+        numpy.ndarray: Single L2-normalized embedding vector
     """
     try:
         if not text or not text.strip():
             raise ValueError("Text cannot be empty")
         
-        embeddings = create_embeddings([text.strip()])
-        return embeddings[0]  # Return single vector
+        # all-MiniLM-L6-v2 lowercases its input, so case does not change the
+        # embedding and repeated questions can share a cache entry
+        return np.frombuffer(_cached_embedding(text.strip().lower()), dtype=np.float32)
         
     except Exception as e:
         error_msg = f"Error creating text embedding: {str(e)}"
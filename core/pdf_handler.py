@@ -1,9 +1,154 @@
 import PyPDF2
+import numpy as np
+import io
+import os
 import re
 import logging
+from concurrent.futures import ProcessPoolExecutor
 
 logger = logging.getLogger(__name__)
 
+# Any run of whitespace, including newlines between lines
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Characters that can end a sentence when followed by whitespace or a capital
+_SENTENCE_ENDINGS = frozenset('.!?\n')
+
+# How far back from the end of a chunk to look for a sentence ending
+SENTENCE_SEARCH_WINDOW = 100
+
+class _BreakMarks(dict):
+    """
+    str.translate table marking sentence-break characters
+    
+    Endings map to 'E', followers (whitespace or uppercase) to 'F',
+    characters that are both ('\\n') to 'B' and everything else to '-'.
+    Marks are computed on first use and then looked up in C.
+    """
+    
+    def __missing__(self, codepoint):
+        char = chr(codepoint)
+        is_ending = char in _SENTENCE_ENDINGS
+        is_follower = char.isspace() or char.isupper()
+        mark = 'B' if is_ending and is_follower else 'E' if is_ending else 'F' if is_follower else '-'
+        self[codepoint] = mark
+        return mark
+
+_BREAK_MARKS = _BreakMarks()
+
+# Every ending mark followed by a follower mark
+_BREAK_PATTERNS = ('EF', 'EB', 'BF', 'BB')
+
+# Smaller PDFs are extracted in-process to avoid worker startup cost
+PARALLEL_MIN_PAGES = 8
+
+def _extract_pages(pdf_reader, start, stop):
+    """
+    Extract raw text from a range of pages
+    
+    Args:
+        pdf_reader (PyPDF2.PdfReader): Opened (and decrypted) PDF reader
+        start (int): First page index
+        stop (int): Page index to stop before
+    
+    Yields:
+        str: Page text for each page, or None if extraction failed
+    """
+    for page_num in range(start, stop):
+        try:
+            yield pdf_reader.pages[page_num].extract_text() or ""
+        except Exception as e:
+            logger.error(f"Error extracting text from page {page_num + 1}: {str(e)}")
+            yield None
+
+def _extract_page_range(pdf_bytes, start, stop):
+    """
+    Worker entry point: parse the PDF once and extract a range of pages
+    """
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+    if pdf_reader.is_encrypted:
+        pdf_reader.decrypt('')
+    return list(_extract_pages(pdf_reader, start, stop))
+
+def _extract_all_pages(pdf_reader, pdf_bytes):
+    """
+    Extract raw text from every page, splitting large PDFs across processes
+    
+    Args:
+        pdf_reader (PyPDF2.PdfReader): Opened (and decrypted) PDF reader
+        pdf_bytes (bytes): Raw PDF content for worker processes
+    
+    Yields:
+        str: Page text for each page in order, or None if extraction failed
+    """
+    total_pages = len(pdf_reader.pages)
+    workers = min(os.cpu_count() or 1, total_pages)
+    
+    if total_pages < PARALLEL_MIN_PAGES or workers < 2:
+        yield from _extract_pages(pdf_reader, 0, total_pages)
+        return
+    
+    # One contiguous page range per worker so each parses the PDF only once
+    step = -(-total_pages // workers)
+    starts = list(range(0, total_pages, step))
+    stops = [min(start + step, total_pages) for start in starts]
+    
+    pages_done = 0
+    try:
+        with ProcessPoolExecutor(max_workers=len(starts)) as executor:
+            results = executor.map(
+                _extract_page_range, [pdf_bytes] * len(starts), starts, stops
+            )
+            for page_texts in results:
+                for page_text in page_texts:
+                    pages_done += 1
+                    yield page_text
+    except Exception as e:
+        logger.warning(f"Parallel extraction failed, falling back to sequential: {str(e)}")
+        yield from _extract_pages(pdf_reader, pages_done, total_pages)
+
+def iter_pdf_pages(uploaded_file):
+    """
+    Extract and clean text from an uploaded PDF one page at a time
+    
+    Args:
+        uploaded_file: Streamlit uploaded file object
+    
+    Yields:
+        str: Cleaned text of each page that contains text
+    
+    Raises:
+        ValueError: If the PDF is password protected
+    """
+    # Reset file pointer to beginning and read the raw bytes once
+    uploaded_file.seek(0)
+    pdf_bytes = uploaded_file.read()
+    
+    # Create PDF reader object
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+    
+    # Check if PDF is encrypted
+    if pdf_reader.is_encrypted:
+        logger.warning("PDF is encrypted. Attempting to decrypt...")
+        try:
+            pdf_reader.decrypt('')  # Try empty password
+        except:
+            raise ValueError("PDF is password protected. Please provide an unlocked PDF.")
+    
+    logger.info(f"Processing PDF with {len(pdf_reader.pages)} pages...")
+    
+    for page_num, page_text in enumerate(_extract_all_pages(pdf_reader, pdf_bytes)):
+        if page_text is None:  # Extraction error already logged
+            continue
+        
+        # Clean up the extracted text
+        cleaned_text = clean_extracted_text(page_text)
+        if cleaned_text:  # Only yield if page has text
+            logger.info(f"Extracted text from page {page_num + 1}")
+            yield cleaned_text
+        else:
+            logger.warning(f"Page {page_num + 1} appears to be empty or image-only")
+
 def extract_text_from_pdf(uploaded_file):
     """
     Extract text from uploaded PDF file
@@ -15,47 +160,16 @@ def extract_text_from_pdf(uploaded_file):
         str: Extracted text content
     """
     try:
-        # Reset file pointer to beginning
-        uploaded_file.seek(0)
-        
-        # Create PDF reader object
-        pdf_reader = PyPDF2.PdfReader(uploaded_file)
-        
-        # Check if PDF is encrypted
-        if pdf_reader.is_encrypted:
-            logger.warning("PDF is encrypted. Attempting to decrypt...")
-            try:
-                pdf_reader.decrypt('')  # Try empty password
-            except:
-                return "Error: PDF is password protected. Please provide an unlocked PDF."
-        
-        # Extract text from all pages
-        full_text = ""
-        total_pages = len(pdf_reader.pages)
-        
-        logger.info(f"Processing PDF with {total_pages} pages...")
-        
-        for page_num, page in enumerate(pdf_reader.pages):
-            try:
-                page_text = page.extract_text()
-                if page_text.strip():  # Only add if page has text
-                    full_text += page_text + "\n\n"
-                    logger.info(f"Extracted text from page {page_num + 1}")
-                else:
-                    logger.warning(f"Page {page_num + 1} appears to be empty or image-only")
-            except Exception as e:
-                logger.error(f"Error extracting text from page {page_num + 1}: {str(e)}")
-                continue
+        cleaned_text = " ".join(iter_pdf_pages(uploaded_file))
         
-        # Clean up the extracted text
-        cleaned_text = clean_extracted_text(full_text)
-        
-        if not cleaned_text.strip():
+        if not cleaned_text:
             return "Error: No readable text found in PDF. This might be a scanned document or image-only PDF."
         
         logger.info(f"Successfully extracted {len(cleaned_text)} characters from PDF")
         return cleaned_text
         
+    except ValueError as e:
+        return f"Error: {str(e)}"
     except Exception as e:
         error_msg = f"Error processing PDF: {str(e)}"
         logger.error(error_msg)
@@ -74,23 +188,27 @@ def clean_extracted_text(text):
     if not text:
         return ""
     
-    # Remove excessive whitespace
-    lines = text.split('\n')
-    cleaned_lines = []
+    # Collapse all whitespace (including line breaks) to single spaces
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+def _find_sentence_break(chunk_text):
+    """
+    Find the last sentence ending near the end of a chunk
     
-    for line in lines:
-        # Strip whitespace and skip empty lines
-        cleaned_line = line.strip()
-        if cleaned_line:
-            cleaned_lines.append(cleaned_line)
+    Args:
+        chunk_text (str): Candidate chunk
     
-    # Join with single spaces and normalize
-    cleaned_text = ' '.join(cleaned_lines)
+    Returns:
+        int: Index just past the sentence ending, or -1 if none was found
+    """
+    lower = max(len(chunk_text) - SENTENCE_SEARCH_WINDOW, 0) + 1
     
-    # Remove multiple spaces
-    cleaned_text = re.sub(r'\s+', ' ', cleaned_text)
+    # Mark the window in one C-level pass, then find the last ending
+    # followed by whitespace or a capital letter
+    marks = chunk_text[lower:].translate(_BREAK_MARKS)
+    best = max(marks.rfind(pattern) for pattern in _BREAK_PATTERNS)
     
-    return cleaned_text.strip()
+    return lower + best + 1 if best >= 0 else -1
 
 def chunk_text(text, chunk_size=1000, chunk_overlap=200):
     """
@@ -107,68 +225,74 @@ def chunk_text(text, chunk_size=1000, chunk_overlap=200):
     if not text or not text.strip():
         return []
     
-    # Clean the text first
-    text = text.strip()
+    # A single piece through the streaming chunker gives the same chunks
+    chunks = list(chunk_text_stream([text.strip()], chunk_size, chunk_overlap))
     
-    # If text is shorter than chunk_size, return as single chunk
-    if len(text) <= chunk_size:
-        return [text]
+    logger.info(f"Text split into {len(chunks)} chunks")
+    return chunks
+
+def chunk_text_stream(text_iter, chunk_size=1000, chunk_overlap=200):
+    """
+    Split a stream of text pieces (e.g. PDF pages) into overlapping chunks
     
-    chunks = []
-    start = 0
+    Pieces are joined with a single space, so the chunks match chunk_text on
+    the joined text, but only the text not yet chunked is held in memory.
     
-    while start < len(text):
-        # Calculate end position
-        end = start + chunk_size
-        
-        # If this is the last chunk, take all remaining text
-        if end >= len(text):
-            chunk = text[start:].strip()
-            if chunk:
-                chunks.append(chunk)
-            break
-        
-        # Try to break at sentence boundary
-        chunk_text = text[start:end]
-        
-        # Find the last sentence ending within the chunk
-        sentence_endings = ['.', '!', '?', '\n']
-        best_break = -1
-        
-        for i in range(len(chunk_text) - 1, max(len(chunk_text) - 100, 0), -1):
-            if chunk_text[i] in sentence_endings and i < len(chunk_text) - 1:
-                if chunk_text[i + 1].isspace() or chunk_text[i + 1].isupper():
-                    best_break = start + i + 1
-                    break
+    Args:
+        text_iter (iterable): Cleaned text pieces, in document order
+        chunk_size (int): Target size of each chunk in characters
+        chunk_overlap (int): Number of characters to overlap between chunks
+    
+    Yields:
+        str: Text chunks
+    """
+    buffer = ""
+    
+    for piece in text_iter:
+        if not piece:
+            continue
+        buffer = f"{buffer} {piece}" if buffer else piece
         
-        # If we found a good sentence break, use it
-        if best_break > start:
-            chunk = text[start:best_break].strip()
-        else:
-            # Otherwise, try to break at word boundary
-            chunk_text = text[start:end]
-            last_space = chunk_text.rfind(' ')
-            if last_space > chunk_size * 0.7:  # Only if we don't lose too much
-                chunk = text[start:start + last_space].strip()
-                end = start + last_space
+        # Emit every chunk that is known not to be the last one
+        start = 0
+        while len(buffer) - start > chunk_size:
+            # Calculate end position
+            end = start + chunk_size
+            
+            # Try to break at sentence boundary
+            chunk_text = buffer[start:end]
+            
+            # Find the last sentence ending within the chunk
+            best_break = -1
+            sentence_break = _find_sentence_break(chunk_text)
+            if sentence_break >= 0:
+                best_break = start + sentence_break
+            
+            # If we found a good sentence break, use it
+            if best_break > start:
+                chunk = buffer[start:best_break].strip()
             else:
-                chunk = chunk_text.strip()
-        
-        if chunk:
-            chunks.append(chunk)
-        
-        # Move start position with overlap
-        start = end - chunk_overlap
+                # Otherwise, try to break at word boundary
+                last_space = chunk_text.rfind(' ')
+                if last_space > chunk_size * 0.7:  # Only if we don't lose too much
+                    chunk = buffer[start:start + last_space].strip()
+                    end = start + last_space
+                else:
+                    chunk = chunk_text.strip()
+            
+            if chunk:
+                yield chunk
+            
+            # Move start position with overlap, making sure we don't go backwards
+            start = max(end - chunk_overlap, start)
         
-        # Make sure we don't go backwards
-        if start < 0:
-            start = 0
-    
-    # Remove any empty chunks
-    chunks = [chunk for chunk in chunks if chunk.strip()]
+        # Drop text that has been fully chunked
+        buffer = buffer[start:]
     
-    logger.info(f"Text split into {len(chunks)} chunks")
-    return chunks
+    # Whatever remains is the last chunk
+    chunk = buffer.strip()
+    if chunk:
+        yield chunk
 
 def get_chunk_info(chunks):
     """
@@ -183,13 +307,13 @@ def get_chunk_info(chunks):
     if not chunks:
         return {"total_chunks": 0, "avg_length": 0, "total_chars": 0}
     
-    total_chars = sum(len(chunk) for chunk in chunks)
-    avg_length = total_chars / len(chunks)
+    # Collect chunk lengths once, then aggregate in NumPy
+    lengths = np.fromiter(map(len, chunks), dtype=np.int64, count=len(chunks))
     
     return {
         "total_chunks": len(chunks),
-        "avg_length": round(avg_length, 1),
-        "total_chars": total_chars,
-        "shortest_chunk": min(len(chunk) for chunk in chunks),
-        "longest_chunk": max(len(chunk) for chunk in chunks)
+        "avg_length": round(float(lengths.mean()), 1),
+        "total_chars": int(lengths.sum()),
+        "shortest_chunk": int(lengths.min()),
+        "longest_chunk": int(lengths.max())
     }
\ No newline at end of file
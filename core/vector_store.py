@@ -1,25 +1,70 @@
 import faiss
 import numpy as np
+import json
 import logging
+import math
+import os
+import platform
+import config
 
 logger = logging.getLogger(__name__)
 
+# Use every core for FAISS search and index building (some builds default to 1)
+faiss.omp_set_num_threads(os.cpu_count() or 4)
+
 # Global variables for session storage
 _vector_store = None
 _document_chunks = None
+_document_key = None  # Content hash of the loaded PDF, used for disk caching
+_store_generation = 0  # Incremented whenever the stored document changes
+_faiss_build_logged = False
+
+# Switch from exact search to an HNSW graph index from this many chunks
+HNSW_MIN_CHUNKS = 2000
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 40
+HNSW_MIN_EF_SEARCH = 16
+
+# Above this many chunks, use an inverted file (IVF) index with ~sqrt(N) lists
+HNSW_MAX_CHUNKS = 10_000
+IVF_NPROBE = 16
 
-def create_vector_store(chunks, embeddings):
+def log_faiss_build_info():
+    """
+    Log which SIMD level (e.g. AVX2, AVX512) the installed FAISS build uses
+    (once per process; call after logging is configured)
+    """
+    global _faiss_build_logged
+    
+    if _faiss_build_logged:
+        return
+    _faiss_build_logged = True
+    
+    compile_options = faiss.get_compile_options()
+    logger.info(f"FAISS compile options: {compile_options}")
+    
+    # On x86 a build without AVX2/AVX512 runs search with scalar kernels
+    if platform.machine().lower() in ("x86_64", "amd64") and not (
+        "AVX2" in compile_options or "AVX512" in compile_options
+    ):
+        logger.warning(
+            "FAISS build has no AVX2/AVX512 support; search will be slower. "
+            "See the deployment notes in README.md."
+        )
+
+def create_vector_store(chunks, embeddings, document_key=None):
     """
     Create FAISS vector store from document chunks
     
     Args:
         chunks (list): List of text chunks from PDF
-        embeddings (numpy.ndarray): Embeddings for the chunks
+        embeddings (numpy.ndarray): L2-normalized embeddings for the chunks
+        document_key (str): Content hash of the PDF, needed to save the store
     
     Returns:
         tuple: (faiss_index, embeddings, chunks)
     """
-    global _vector_store, _document_chunks
+    global _vector_store, _document_chunks, _document_key, _store_generation
     
     try:
         logger.info(f"Creating vector store for {len(chunks)} chunks")
@@ -27,18 +72,58 @@ def create_vector_store(chunks, embeddings):
         # Get embedding dimension
         dimension = embeddings.shape[1]  # Should be 384 for all-MiniLM-L6-v2
         
-        # Create FAISS index (IndexFlatIP for cosine similarity)
-        index = faiss.IndexFlatIP(dimension)
+        # Embeddings come L2-normalized from create_embeddings, so inner
+        # product is cosine similarity. FAISS needs C-contiguous float32;
+        # this is a no-op (no copy) when the array already is.
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        
+        if len(chunks) < HNSW_MIN_CHUNKS:
+            if config.USE_SQ8:
+                # Store vectors as 8-bit codes (4x smaller than float32)
+                index = faiss.IndexScalarQuantizer(
+                    dimension, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT
+                )
+            else:
+                # Create FAISS index (IndexFlatIP for exact cosine similarity)
+                index = faiss.IndexFlatIP(dimension)
+        elif len(chunks) <= HNSW_MAX_CHUNKS:
+            # Large documents: approximate search over an HNSW graph
+            if config.USE_SQ8:
+                index = faiss.IndexHNSWSQ(
+                    dimension, faiss.ScalarQuantizer.QT_8bit, HNSW_M, faiss.METRIC_INNER_PRODUCT
+                )
+            else:
+                index = faiss.IndexHNSWFlat(dimension, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+            logger.info("Using HNSW index for large document")
+        else:
+            # Very large collections: only search the nearest IVF lists
+            nlist = int(math.sqrt(len(chunks)))
+            quantizer = faiss.IndexFlatIP(dimension)
+            if config.USE_SQ8:
+                index = faiss.IndexIVFScalarQuantizer(
+                    quantizer, dimension, nlist,
+                    faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT
+                )
+            else:
+                index = faiss.IndexIVFFlat(
+                    quantizer, dimension, nlist, faiss.METRIC_INNER_PRODUCT
+                )
+            logger.info(f"Using IVF index with {nlist} lists for large collection")
         
-        # Normalize embeddings for cosine similarity
-        faiss.normalize_L2(embeddings)
+        # Scalar quantizers learn per-dimension value ranges and IVF learns
+        # its list centroids before adding
+        if not index.is_trained:
+            index.train(embeddings)
         
         # Add embeddings to index
-        index.add(embeddings.astype('float32'))
+        index.add(embeddings)
         
         # Store in global variables for session
         _vector_store = index
         _document_chunks = chunks
+        _document_key = document_key
+        _store_generation += 1
         
         logger.info(f"Vector store created successfully with {index.ntotal} vectors")
         return index, embeddings, chunks
@@ -48,13 +133,14 @@ def create_vector_store(chunks, embeddings):
         logger.error(error_msg)
         raise Exception(error_msg)
 
-def search_similar_chunks(query_embedding, top_k=3):
+def search_similar_chunks(query_embedding, top_k=3, min_similarity=None):
     """
     Search for similar chunks in the vector store
     
     Args:
-        query_embedding (numpy.ndarray): Embedding of the user's question
+        query_embedding (numpy.ndarray): L2-normalized embedding of the user's question
         top_k (int): Number of similar chunks to return
+        min_similarity (float): Only return chunks scoring above this, if given
     
     Returns:
         list: List of tuples (chunk_text, similarity_score)
@@ -68,21 +154,35 @@ def search_similar_chunks(query_embedding, top_k=3):
         logger.info(f"Searching for {top_k} similar chunks")
         
         # Reshape and prepare query embedding
-        query_embedding = query_embedding.reshape(1, -1).astype('float32')
+        query_embedding = np.ascontiguousarray(
+            query_embedding.reshape(1, -1), dtype=np.float32
+        )
         
-        # Normalize query embedding
-        faiss.normalize_L2(query_embedding)
+        # Widen the HNSW search beam with the number of results requested
+        if isinstance(_vector_store, faiss.IndexHNSW):
+            _vector_store.hnsw.efSearch = max(HNSW_MIN_EF_SEARCH, top_k * 4)
+        
+        # Number of IVF lists scanned per query
+        if isinstance(_vector_store, faiss.IndexIVF):
+            _vector_store.nprobe = IVF_NPROBE
         
         # Search in FAISS index
         similarities, indices = _vector_store.search(query_embedding, top_k)
         
+        similarities, indices = similarities[0], indices[0]
+        
+        # Keep valid ids (-1 means no result) above the similarity threshold
+        keep = (indices >= 0) & (indices < len(_document_chunks))
+        if min_similarity is not None:
+            keep &= similarities > min_similarity
+        similarities, indices = similarities[keep], indices[keep]
+        
         # Prepare results
         results = []
-        for i, (similarity, idx) in enumerate(zip(similarities[0], indices[0])):
-            if idx < len(_document_chunks):  # Safety check
-                chunk_text = _document_chunks[idx]
-                results.append((chunk_text, float(similarity)))
-                logger.info(f"Found similar chunk {i+1} with similarity: {similarity:.3f}")
+        for i, (similarity, idx) in enumerate(zip(similarities, indices)):
+            chunk_text = _document_chunks[idx]
+            results.append((chunk_text, float(similarity)))
+            logger.info(f"Found similar chunk {i+1} with similarity: {similarity:.3f}")
         
         logger.info(f"Retrieved {len(results)} similar chunks")
         return results
@@ -92,14 +192,84 @@ def search_similar_chunks(query_embedding, top_k=3):
         logger.error(error_msg)
         raise Exception(error_msg)
 
+def _cache_paths(document_key):
+    """
+    Get the index and chunks file paths for a cached document
+    """
+    base_path = os.path.join(config.CACHE_DIR, document_key)
+    return f"{base_path}.faiss", f"{base_path}.chunks.json"
+
+def save_vector_store():
+    """
+    Save the current vector store to disk so the same PDF can skip processing
+    """
+    global _vector_store, _document_chunks, _document_key
+    
+    if _vector_store is None or _document_key is None:
+        raise ValueError("No keyed vector store to save.")
+    
+    try:
+        os.makedirs(config.CACHE_DIR, exist_ok=True)
+        index_path, chunks_path = _cache_paths(_document_key)
+        
+        with open(chunks_path, "w", encoding="utf-8") as f:
+            json.dump(_document_chunks, f)
+        
+        # Index is written last: its presence marks a complete cache entry
+        faiss.write_index(_vector_store, index_path)
+        
+        logger.info(f"Vector store saved to cache: {_document_key}")
+        
+    except Exception as e:
+        # Caching is an optimization; the loaded store is still usable
+        logger.warning(f"Could not save vector store to cache: {str(e)}")
+
+def load_vector_store(document_key):
+    """
+    Load a previously saved vector store for a PDF
+    
+    Args:
+        document_key (str): Content hash of the PDF
+    
+    Returns:
+        bool: True if the store was loaded from cache
+    """
+    global _vector_store, _document_chunks, _document_key, _store_generation
+    
+    index_path, chunks_path = _cache_paths(document_key)
+    if not (os.path.exists(index_path) and os.path.exists(chunks_path)):
+        return False
+    
+    try:
+        index = faiss.read_index(index_path)
+        with open(chunks_path, encoding="utf-8") as f:
+            chunks = json.load(f)
+        
+        if index.ntotal != len(chunks):
+            raise ValueError("index and chunks do not match")
+        
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable vector store cache {document_key}: {str(e)}")
+        return False
+    
+    _vector_store = index
+    _document_chunks = chunks
+    _document_key = document_key
+    _store_generation += 1
+    
+    logger.info(f"Vector store loaded from cache with {index.ntotal} vectors")
+    return True
+
 def clear_vector_store():
     """
     Clear the current vector store (for new PDF uploads)
     """
-    global _vector_store, _document_chunks
+    global _vector_store, _document_chunks, _document_key, _store_generation
     
     _vector_store = None
     _document_chunks = None
+    _document_key = None
+    _store_generation += 1
     logger.info("Vector store cleared")
 
 def get_vector_store_info():
@@ -112,10 +282,18 @@ def get_vector_store_info():
     global _vector_store, _document_chunks
     
     if _vector_store is None:
-        return {"status": "empty", "total_vectors": 0, "total_chunks": 0}
+        return {
+            "status": "empty",
+            "total_vectors": 0,
+            "total_chunks": 0,
+            "generation": _store_generation,
+            "document_key": None
+        }
     
     return {
         "status": "ready",
+        "generation": _store_generation,
+        "document_key": _document_key,
         "total_vectors": _vector_store.ntotal,
         "total_chunks": len(_document_chunks) if _document_chunks else 0,
         "dimension": _vector_store.d
@@ -9,16 +9,64 @@ logger = logging.getLogger(__name__)
 # Configure Gemini API
 genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
 
-def generate_gemini_response(query, context):
+GEMINI_MODEL_NAME = 'gemini-1.5-flash'
+
+# Static instructions, sent as the system instruction so every request
+# shares the same prefix and only the context and question vary
+SYSTEM_INSTRUCTION = """You are a helpful assistant that answers questions based on provided document content.
+
+INSTRUCTIONS:
+1. Answer the question based ONLY on the provided context
+2. If the context doesn't contain enough information, say so clearly
+3. Be specific and cite relevant parts when possible
+4. Keep your answer concise but complete
+5. If asked about something not in the context, state that the information is not available in the document"""
+
+# Created once and reused for every request
+_gemini_model = genai.GenerativeModel(
+    GEMINI_MODEL_NAME,
+    generation_config={"temperature": 0.2},
+    system_instruction=SYSTEM_INSTRUCTION
+)
+
+EMPTY_RESPONSE_MESSAGE = "I apologize, but I couldn't generate a response. Please try again."
+
+def _first_text(chunks):
+    """
+    Read a streaming Gemini response up to its first piece of text
+    
+    Returns:
+        str: First non-empty text, or None if the response had no text
+    """
+    for chunk in chunks:
+        if chunk.text:
+            return chunk.text
+    return None
+
+def _stream_text(first_text, chunks):
+    """
+    Yield answer text from a streaming Gemini response as it arrives
+    
+    Errors raised while streaming propagate to the consumer.
+    """
+    yield first_text
+    for chunk in chunks:
+        if chunk.text:
+            yield chunk.text
+    
+    logger.info("Successfully streamed response from Gemini")
+
+def generate_gemini_response(query, context, stream=False):
     """
     Generate response using Gemini API based on context and query
     
     Args:
         query (str): User's question
         context (str): Relevant context from PDF
+        stream (bool): Return the answer as a stream of text pieces
     
     Returns:
-        dict: Response with answer and metadata
+        dict: Response with answer (or answer_stream when streaming) and metadata
     """
     try:
         if not query.strip():
@@ -33,31 +81,37 @@ def generate_gemini_response(query, context):
                 "status": "no_context"
             }
         
-        # Create the prompt for Gemini
-        prompt = f"""
-You are a helpful assistant that answers questions based on provided document content.
-
-CONTEXT FROM DOCUMENT:
+        # Create the prompt for Gemini (instructions are in SYSTEM_INSTRUCTION)
+        prompt = f"""CONTEXT FROM DOCUMENT:
 {context}
 
 USER QUESTION: {query}
 
-INSTRUCTIONS:
-1. Answer the question based ONLY on the provided context
-2. If the context doesn't contain enough information, say so clearly
-3. Be specific and cite relevant parts when possible
-4. Keep your answer concise but complete
-5. If asked about something not in the context, state that the information is not available in the document
-
 ANSWER:"""
 
         logger.info("Sending request to Gemini API")
         
-        # Initialize Gemini model
-        model = genai.GenerativeModel('gemini-1.5-flash')
+        if stream:
+            response = _gemini_model.generate_content(prompt, stream=True)
+            
+            # Wait for the first text so empty or blocked responses are
+            # reported like the non-streaming path, not as a success
+            chunks = iter(response)
+            first_text = _first_text(chunks)
+            if first_text is None:
+                return {
+                    "answer": EMPTY_RESPONSE_MESSAGE,
+                    "status": "empty_response"
+                }
+            
+            return {
+                "answer_stream": _stream_text(first_text, chunks),
+                "status": "success",
+                "model_used": GEMINI_MODEL_NAME
+            }
         
         # Generate response
-        response = model.generate_content(prompt)
+        response = _gemini_model.generate_content(prompt)
         
         if response and response.text:
             answer = response.text.strip()
@@ -66,11 +120,11 @@ ANSWER:"""
             return {
                 "answer": answer,
                 "status": "success",
-                "model_used": "gemini-1.5-flash"
+                "model_used": GEMINI_MODEL_NAME
             }
         else:
             return {
-                "answer": "I apologize, but I couldn't generate a response. Please try again.",
+                "answer": EMPTY_RESPONSE_MESSAGE,
                 "status": "empty_response"
             }
             
@@ -2,8 +2,9 @@ import os
 import logging
 from datetime import datetime
 from core.embeddings import get_text_embedding
-from core.vector_store import search_similar_chunks
+from core.vector_store import search_similar_chunks, get_vector_store_info
 from models.gemini import generate_gemini_response
+import config
 
 # Create logs directory if it doesn't exist
 os.makedirs("logs", exist_ok=True)
@@ -27,6 +28,13 @@ logger = logging.getLogger(__name__)
 # Mark the start of a new run
 logger.info("========== New run started ==========")
 
+# Chunks starting with the same text are treated as duplicates
+CONTEXT_DEDUP_PREFIX_CHARS = 200
+
+# Successful answers for recent questions, keyed on (query, store generation)
+ANSWER_CACHE_SIZE = 128
+_answer_cache = {}
+
 def get_relevant_context(query, top_k=3):
     """
     Get relevant context chunks for a user query
@@ -49,18 +57,10 @@ def get_relevant_context(query, top_k=3):
         # Get query embedding
         query_embedding = get_text_embedding(query)
         
-        # Search for similar chunks
-        search_results = search_similar_chunks(query_embedding, top_k=top_k)
-        
-        if not search_results:
-            return {
-                "context": "",
-                "chunks": [],
-                "message": "No relevant content found in the document."
-            }
-        
-        # Filter results by similarity threshold (0.3 is reasonable)
-        relevant_results = [(chunk, score) for chunk, score in search_results if score > 0.3]
+        # Search for similar chunks above the similarity threshold
+        relevant_results = search_similar_chunks(
+            query_embedding, top_k=top_k, min_similarity=config.MIN_SIMILARITY
+        )
         
         if not relevant_results:
             return {
@@ -69,6 +69,22 @@ def get_relevant_context(query, top_k=3):
                 "message": "No sufficiently relevant content found for your question."
             }
         
+        # Results are sorted by similarity, so fill the context budget greedily
+        # from the best match, skipping chunks that repeat an earlier one
+        selected_results = []
+        seen_prefixes = set()
+        total_chars = 0
+        for chunk, score in relevant_results:
+            prefix = chunk[:CONTEXT_DEDUP_PREFIX_CHARS]
+            if prefix in seen_prefixes:
+                continue
+            if selected_results and total_chars + len(chunk) > config.MAX_CONTEXT_CHARS:
+                break
+            seen_prefixes.add(prefix)
+            selected_results.append((chunk, score))
+            total_chars += len(chunk)
+        relevant_results = selected_results
+        
         # Combine chunks into context
         context_parts = []
         for i, (chunk, score) in enumerate(relevant_results, 1):
@@ -93,12 +109,45 @@ def get_relevant_context(query, top_k=3):
             "message": error_msg
         }
 
-def answer_question(query):
+def _cache_answer(cache_key, result):
+    """
+    Store a successful answer, dropping the oldest entry when the cache is full
+    """
+    if len(_answer_cache) >= ANSWER_CACHE_SIZE:
+        _answer_cache.pop(next(iter(_answer_cache)))
+    _answer_cache[cache_key] = result
+
+def _stream_and_cache(answer_stream, cache_key, result):
+    """
+    Pass streamed answer text through, caching the full answer once it
+    completes with real text
+    """
+    parts = []
+    try:
+        for text in answer_stream:
+            parts.append(text)
+            yield text
+    except Exception as e:
+        logger.error(f"Error streaming answer: {str(e)}")
+        yield f"\n\nAn error occurred while generating the answer: {str(e)}"
+        return
+    
+    answer = "".join(parts)
+    if not answer.strip():
+        return
+    
+    cached_result = {key: value for key, value in result.items() if key != "answer_stream"}
+    cached_result["answer"] = answer
+    _cache_answer(cache_key, cached_result)
+
+def answer_question(query, stream=False):
     """
     Complete Q&A pipeline: retrieve context and generate answer
     
     Args:
         query (str): User's question
+        stream (bool): Stream the answer text; the result then has an
+            "answer_stream" generator unless the answer was cached
     
     Returns:
         dict: Complete response with answer, context, and metadata
@@ -106,6 +155,12 @@ def answer_question(query):
     try:
         logger.info(f"Processing question: '{query[:50]}...'")
         
+        # Reuse the answer if this question was already asked of this document
+        cache_key = (query.strip(), get_vector_store_info()["generation"])
+        if cache_key in _answer_cache:
+            logger.info("Using cached answer")
+            return _answer_cache[cache_key]
+        
         # Step 1: Get relevant context
         context_result = get_relevant_context(query)
         
@@ -118,16 +173,28 @@ def answer_question(query):
             }
         
         # Step 2: Generate answer with Gemini
-        gemini_result = generate_gemini_response(query, context_result["context"])
+        gemini_result = generate_gemini_response(
+            query, context_result["context"], stream=stream
+        )
         
-        return {
-            "answer": gemini_result["answer"],
+        result = {
+            "answer": gemini_result.get("answer", ""),
             "context_chunks": context_result["chunks"],
             "status": gemini_result["status"],
             "query": query,
             "model_used": gemini_result.get("model_used", "unknown")
         }
         
+        # Only cache real answers so transient API errors can be retried
+        if "answer_stream" in gemini_result:
+            result["answer_stream"] = _stream_and_cache(
+                gemini_result["answer_stream"], cache_key, result
+            )
+        elif result["status"] == "success":
+            _cache_answer(cache_key, result)
+        
+        return result
+        
     except Exception as e:
         error_msg = f"Error in Q&A pipeline: {str(e)}"
         logger.error(error_msg)